@@ -4,7 +4,7 @@ import os
 from typing import List, Tuple
 
 # Supported slide file extensions
-SUPPORTED_EXTENSIONS = ['.svs', '.ndpi', '.scn', '.vms', '.vmu', '.mrxs']
+SUPPORTED_EXTENSIONS = frozenset(('.svs', '.ndpi', '.scn', '.vms', '.vmu', '.mrxs'))
 
 # Default settings
 DEFAULT_PREFIX = "KPC12-1_"
@@ -15,6 +15,21 @@ DEFAULT_ROTATION_ANGLE = 270
 LABEL_FOLDER = "label_image"
 CANNOT_OPEN_FOLDER = "cannot_open"
 
+# Crop selection saved per slide folder so re-runs can skip the crop selector
+CROP_COORDS_FILENAME = ".wsi_crop.json"
+
+# Crop the images in the label folder were cut with, kept in that folder so resumed runs only
+# skip labels cut with the crop now in effect
+LABEL_CROP_FILENAME = ".wsi_label_crop.json"
+
+# Result of the ImageTk.PhotoImage check, cached in the temp directory between launches
+PHOTOIMAGE_PROBE_FILENAME = ".wsi_photoimage_ok"
+
+# Label image output
+LABEL_JPEG_QUALITY = 85
+LABEL_JPEG_SUBSAMPLING = "420"  # Chroma subsampling: "444", "422" or "420"
+LABEL_JPEG_PROGRESSIVE = False  # Progressive files are a little smaller but slower to encode and decode
+
 # GUI settings
 WINDOW_SIZE = (800, 600)
 IMAGE_DISPLAY_SIZE = (400, 300)
@@ -24,7 +39,11 @@ DUPLICATE_SUFFIX = "_b"
 LOG_FILENAME = "renaming_log.csv"
 
 # Skip files starting with these characters
-SKIP_PREFIXES = ['.', 'T']
+SKIP_PREFIXES = ('.', 'T')
 
 # Parallel processing settings
-DEFAULT_BATCH_SIZE = 12  # Number of slides to process in parallel per batch
\ No newline at end of file
+DEFAULT_BATCH_SIZE = 12  # Number of slides to process in parallel per batch
+PREFETCH_SLIDE_HEADERS = True  # Read the next batch's slide headers ahead (helps on network storage)
+OPENSLIDE_CACHE_BYTES = 16 << 20  # Tile cache shared by all slide handles in a process
+WORKER_OPENSLIDE_CACHE_BYTES = 0  # Worker processes read each slide once and never reuse tiles
+
@@ -32,6 +32,13 @@ if errorlevel 1 (
     exit /b 1
 )
 
+echo.
+echo Installing optional faster JPEG encoder (simplejpeg)...
+pip install "simplejpeg>=1.6.0"
+if errorlevel 1 (
+    echo simplejpeg is not available for this Python - OpenCV/Pillow will be used instead
+)
+
 echo.
 echo ===============================================
 echo Python packages installed successfully!
@@ -1,12 +1,17 @@
 """Phase 1: Label Image Extraction from histology slides."""
 
+import base64
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener
 import os
-import traceback
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Union
 from pathlib import Path
 import tempfile
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from functools import partial
+from contextlib import closing
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 try:
     import openslide
@@ -14,18 +19,47 @@ except ImportError:
     print("OpenSlide not found. Please install openslide-python: pip install openslide-python")
     exit(1)
 
-from PIL import Image, ImageTk
-import tkinter as tk
-from tkinter import messagebox, simpledialog
-import cv2
+import PIL
+from PIL import Image
 import numpy as np
 
+try:
+    import simplejpeg
+except ImportError:
+    simplejpeg = None  # Fall back to OpenCV or Pillow for JPEG encoding
+
 import config
 import utils
 
+log = logging.getLogger(__name__)
+
+# Pillow-SIMD releases carry a .postN version suffix
+PILLOW_SIMD = '.post' in PIL.__version__
+
+# Pillow's numeric codes for the chroma subsampling names used in config
+_PIL_SUBSAMPLING = {'444': 0, '422': 1, '420': 2}
+
+# Associated image name fragments that mark a direct label
+_LABEL_KEYWORDS = ('label', 'overview')
+
+# Label source recorded when a slide's label comes from its pyramid rather than an associated image
+LEVEL_OVERVIEW_SOURCE = '<level overview>'
+
+# Counter-clockwise right-angle rotations that need no resampling
+_TRANSPOSE_FOR_ANGLE = {
+    90: Image.Transpose.ROTATE_90,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_270,
+}
+
+# Two-digit hex strings for every byte value, used to build Tk colour names
+_HEX_BYTE = [f"{value:02x}" for value in range(256)]
+
 
 def process_slide_parallel(slide_file: str, crop_coords: Optional[Tuple[int, int, int, int]], 
-                          label_folder: str, cannot_open_folder: str) -> Tuple[str, bool, str]:
+                          label_folder: Path, cannot_open_folder: Path,
+                          rotation: int = config.DEFAULT_ROTATION_ANGLE,
+                          label_source: Optional[str] = None) -> Tuple[str, bool, str]:
     """
     Process a single slide file in parallel.
     
@@ -34,6 +68,8 @@ def process_slide_parallel(slide_file: str, crop_coords: Optional[Tuple[int, int
         crop_coords: Crop coordinates (x1, y1, x2, y2) or None
         label_folder: Path to label output folder
         cannot_open_folder: Path to cannot_open folder
+        rotation: Rotation angle applied to the label image
+        label_source: Image the first slide's label came from, or None to probe
         
     Returns:
         Tuple of (slide_filename, success, message)
@@ -42,24 +78,31 @@ def process_slide_parallel(slide_file: str, crop_coords: Optional[Tuple[int, int
     
     try:
         # Extract label image
-        result = _extract_label_image_standalone(slide_file, cannot_open_folder)
+        result = _extract_label_image_standalone(slide_file, cannot_open_folder, label_source, crop_coords)
         if result is None:
             return (slide_filename, False, "Could not extract label image")
         
-        label_image, is_direct_label = result
+        label_pixels, is_direct_label, already_cropped = result
         
         # Determine if we need to crop
-        need_crop = crop_coords is not None and not is_direct_label
-        
-        # Process the image (crop and rotate)
-        processed_image = _process_label_image_standalone(label_image, crop_coords, need_crop)
-        if processed_image is None:
-            return (slide_filename, False, "Failed to process label image")
+        need_crop = crop_coords is not None and not is_direct_label and not already_cropped
         
-        # Save processed image
         output_filename = _get_label_filename_standalone(slide_file)
-        output_path = os.path.join(label_folder, output_filename)
-        processed_image.save(output_path, "JPEG", quality=90)
+        output_path = Path(label_folder) / output_filename
+        
+        if rotation % 90 == 0:
+            # Right angles: crop view + rot90 go straight to the encoder without a PIL round-trip
+            pixels = _process_label_array(label_pixels, crop_coords, need_crop, rotation)
+            _save_label_array(pixels, output_path)
+        else:
+            # Process the image (crop and rotate)
+            processed_image = _process_label_image_standalone(Image.fromarray(label_pixels), crop_coords,
+                                                              need_crop, rotation)
+            if processed_image is None:
+                return (slide_filename, False, "Failed to process label image")
+            
+            # Save processed image
+            _save_label_image(processed_image, output_path)
         
         method = "direct label" if is_direct_label else "cropped overview"
         return (slide_filename, True, f"Label extracted ({method})")
@@ -68,106 +111,422 @@ def process_slide_parallel(slide_file: str, crop_coords: Optional[Tuple[int, int
         return (slide_filename, False, f"Error: {str(e)}")
 
 
-def _extract_label_image_standalone(slide_file: str, cannot_open_folder: str) -> Optional[Tuple[Image.Image, bool]]:
-    """Standalone version of _extract_label_image for parallel processing."""
+def _worker_init(log_queue=None, log_level: int = logging.WARNING) -> None:
+    """Process pool initializer: set up per-worker state once instead of per slide."""
+    # Hand log records to the parent's listener instead of writing to a shared stream
+    if log_queue is not None:
+        root_logger = logging.getLogger()
+        root_logger.handlers = [QueueHandler(log_queue)]
+        root_logger.setLevel(log_level)
+    
+    # Workers read each slide once, so tiles are never reused - keep the cache minimal
+    _configure_slide_cache(config.WORKER_OPENSLIDE_CACHE_BYTES)
+    
+    # Register Pillow's JPEG plugin and run the JPEG encoder once up front,
+    # so the first slide a worker receives does not pay for loading either
+    Image.preinit()
+    warmup_pixels = np.zeros((8, 8, 3), dtype=np.uint8)
+    if _simplejpeg_usable():
+        simplejpeg.encode_jpeg(warmup_pixels, quality=config.LABEL_JPEG_QUALITY)
+        return
     try:
-        # Try to open slide
-        slide = openslide.OpenSlide(slide_file)
-        
-        # Method 1: Try to get direct label image (best option!)
-        if 'label' in slide.associated_images:
-            label_image = slide.associated_images['label']
-            
-            # Convert RGBA to RGB if needed
-            if label_image.mode == 'RGBA':
-                label_image = label_image.convert('RGB')
+        import cv2
+    except ImportError:
+        return
+    cv2.imencode('.jpg', warmup_pixels)
+
+
+def _process_slide_worker(args: Tuple[str, Path, Path, Optional[Tuple[int, int, int, int]], int, Optional[str]]
+                          ) -> Tuple[str, bool, str]:
+    """
+    Pool entry point taking
+    (slide_file, label_folder, cannot_open_folder, crop_coords, rotation, label_source).
+    """
+    slide_file, label_folder, cannot_open_folder, crop_coords, rotation, label_source = args
+    return process_slide_parallel(slide_file, crop_coords, label_folder, cannot_open_folder, rotation,
+                                  label_source)
+
+
+# Classic and BigTIFF headers, little and big endian
+_TIFF_MAGICS = (b'II*\x00', b'MM\x00*', b'II+\x00', b'MM\x00+')
+
+# Slide formats stored as a single TIFF container
+_TIFF_EXTENSIONS = frozenset(('.svs', '.ndpi', '.scn'))
+
+
+def _quick_sniff(slide_file: str) -> bool:
+    """Cheap pre-check that a slide file looks like its extension claims."""
+    base, ext = os.path.splitext(slide_file)
+    ext = ext.lower()
+    
+    if ext in _TIFF_EXTENSIONS:
+        try:
+            with open(slide_file, 'rb') as f:
+                head = f.read(4)
+        except OSError:
+            return False
+        return head in _TIFF_MAGICS
+    
+    if ext == '.mrxs':
+        # MIRAX keeps its index in a sibling directory named after the slide
+        return os.path.isfile(os.path.join(base, 'Slidedat.ini'))
+    
+    # Other formats are left to OpenSlide
+    return True
+
+
+# Tile cache shared by every slide handle opened in this process (OpenSlide >= 4.0)
+_slide_cache = None
+
+
+def _configure_slide_cache(capacity: int) -> None:
+    """Create the process-wide OpenSlide tile cache with the given capacity in bytes."""
+    global _slide_cache
+    
+    if hasattr(openslide, 'OpenSlideCache'):
+        try:
+            _slide_cache = openslide.OpenSlideCache(capacity)
+        except openslide.OpenSlideVersionError:
+            # Older OpenSlide library: keep its default per-handle cache
+            pass
+
+
+def _open_slide(slide_file: str) -> "openslide.OpenSlide":
+    """Open a slide and attach the process-wide tile cache when OpenSlide supports it."""
+    # Reject obviously wrong files without running OpenSlide's full format probe
+    if not _quick_sniff(slide_file):
+        raise openslide.OpenSlideUnsupportedFormatError(
+            f"Not a recognised slide file: {os.path.basename(slide_file)}")
+    
+    slide = openslide.OpenSlide(slide_file)
+    
+    if _slide_cache is None:
+        _configure_slide_cache(config.OPENSLIDE_CACHE_BYTES)
+    if _slide_cache is not None:
+        slide.set_cache(_slide_cache)
+    
+    return slide
+
+
+def _rgb_pixels(image: Image.Image) -> np.ndarray:
+    """RGB pixel array of an image; an alpha channel is sliced off as a view rather than converted."""
+    if image.mode not in ('RGB', 'RGBA'):
+        # Palette and greyscale labels are rare; only they pay for a conversion
+        image = image.convert('RGB')
+    pixels = np.asarray(image)
+    if image.mode == 'RGBA':
+        pixels = pixels[..., :3]
+    return pixels
+
+
+def _drop_alpha(image: Image.Image) -> Image.Image:
+    """Return an RGB copy of an RGBA image by slicing off the alpha channel."""
+    if image.mode == 'RGBA':
+        return Image.fromarray(_rgb_pixels(image))
+    return image
+
+
+def _find_label_keyword_image(associated_images) -> Optional[str]:
+    """Name of the first non-macro associated image whose name suggests a label, if any."""
+    return next((name for name in associated_images
+                 if name != 'macro' and any(keyword in name.lower() for keyword in _LABEL_KEYWORDS)), None)
+
+
+def _read_level_overview(slide: "openslide.OpenSlide") -> Image.Image:
+    """Read the level 6 (or lowest available) overview of a slide."""
+    target_level = min(6, slide.level_count - 1)
+    
+    # Get dimensions for the target level
+    level_dims = slide.level_dimensions[target_level]
+    log.debug("Using level %s overview %s", target_level, level_dims)
+    
+    # Thumbnail of the entire level - this contains BOTH tissue and label areas.
+    # OpenSlide composites it onto the slide background, so it is already RGB.
+    return slide.get_thumbnail(level_dims)
+
+
+def _read_level_overview_region(slide: "openslide.OpenSlide", crop_coords: Tuple[int, int, int, int]
+                                ) -> Optional[Image.Image]:
+    """Read only the crop_coords box of the level overview, so OpenSlide decodes just the tiles under it.
+    
+    Returns None when the box is empty or not fully inside the overview; the caller then
+    crops the full overview, which pads the outside part like Image.crop.
+    """
+    target_level = min(6, slide.level_count - 1)
+    level_width, level_height = slide.level_dimensions[target_level]
+    
+    x1, y1, x2, y2 = crop_coords
+    if not (0 <= x1 < x2 <= level_width and 0 <= y1 < y2 <= level_height):
+        return None
+    
+    # read_region takes its location in level 0 coordinates
+    downsample = slide.level_downsamples[target_level]
+    region = slide.read_region((int(x1 * downsample), int(y1 * downsample)), target_level,
+                               (x2 - x1, y2 - y1))
+    
+    # Composite onto the slide background like get_thumbnail does for the full overview
+    background_color = '#' + slide.properties.get(openslide.PROPERTY_NAME_BACKGROUND_COLOR, 'ffffff')
+    overview = Image.new('RGB', region.size, background_color)
+    overview.paste(region, None, region)
+    return overview
+
+
+def _extract_label_image_standalone(slide_file: str, cannot_open_folder: Path,
+                                    label_source: Optional[str] = None,
+                                    crop_coords: Optional[Tuple[int, int, int, int]] = None
+                                    ) -> Optional[Tuple[np.ndarray, bool, bool]]:
+    """
+    Standalone version of _extract_label_image for parallel processing.
+    
+    Returns the label as an RGB NumPy array so workers decode it once and never
+    go back through PIL before encoding. When label_source names the image the
+    first slide used, it is read directly instead of probing the slide again;
+    a level overview source with crop_coords is read already cropped.
+    
+    Returns (pixels, is_direct_label, already_cropped), or None if the slide cannot be opened.
+    """
+    try:
+        # The handle is closed on every exit, before a failed slide is moved
+        with closing(_open_slide(slide_file)) as slide:
+            # Slides from one scanner share a layout: read the first slide's source directly
+            if label_source == LEVEL_OVERVIEW_SOURCE:
+                region = _read_level_overview_region(slide, crop_coords) if crop_coords is not None else None
+                if region is not None:
+                    return _rgb_pixels(region), False, True
+                return _rgb_pixels(_read_level_overview(slide)), False, False
+            if label_source is not None and label_source in slide.associated_images:
+                label_image = slide.associated_images[label_source]
+                return _rgb_pixels(label_image), label_source != 'macro', False
             
-            slide.close()
-            return label_image, True  # True means no cropping needed
-        
-        # Method 2: Check for 'macro' image specifically (needs cropping)
-        if 'macro' in slide.associated_images:
-            label_image = slide.associated_images['macro']
+            # Method 1: Try to get direct label image (best option!)
+            if 'label' in slide.associated_images:
+                label_image = slide.associated_images['label']
+                return _rgb_pixels(label_image), True, False  # True means no cropping needed
             
-            # Convert RGBA to RGB if needed
-            if label_image.mode == 'RGBA':
-                label_image = label_image.convert('RGB')
+            # Method 2: Check for 'macro' image specifically (needs cropping)
+            if 'macro' in slide.associated_images:
+                label_image = slide.associated_images['macro']
+                return _rgb_pixels(label_image), False, False  # False means cropping IS needed
             
-            slide.close()
-            return label_image, False  # False means cropping IS needed
-        
-        # Method 3: Check for other associated images that might be direct labels
-        for assoc_name in slide.associated_images.keys():
-            if any(keyword in assoc_name.lower() for keyword in ['label', 'overview']) and assoc_name != 'macro':
+            # Method 3: Check for other associated images that might be direct labels
+            assoc_name = _find_label_keyword_image(slide.associated_images)
+            if assoc_name is not None:
                 label_image = slide.associated_images[assoc_name]
-                
-                # Convert RGBA to RGB if needed
-                if label_image.mode == 'RGBA':
-                    label_image = label_image.convert('RGB')
-                
-                slide.close()
-                return label_image, True  # True means no cropping needed
-        
-        # Method 4: Fall back to level 6 overview (requires cropping)
-        target_level = min(6, slide.level_count - 1)
-        
-        # Get dimensions for the target level
-        level_dims = slide.level_dimensions[target_level]
-        
-        # Read the entire level - this contains BOTH tissue and label areas
-        whole_image = slide.read_region((0, 0), target_level, level_dims)
-        
-        # Convert RGBA to RGB if needed
-        if whole_image.mode == 'RGBA':
-            whole_image = whole_image.convert('RGB')
-        
-        slide.close()
-        return whole_image, False  # False means cropping IS needed
+                return _rgb_pixels(label_image), True, False  # True means no cropping needed
+            
+            # Method 4: Fall back to level 6 overview (requires cropping)
+            whole_image = _read_level_overview(slide)
+            return _rgb_pixels(whole_image), False, False  # False means cropping IS needed
         
     except Exception as e:
-        print(f"Cannot open slide {os.path.basename(slide_file)}: {e}")
+        log.warning("Cannot open slide %s: %s", os.path.basename(slide_file), e)
         # Move to cannot_open folder
         try:
             utils.move_file(slide_file, cannot_open_folder)
-            print(f"Moved to cannot_open folder: {os.path.basename(slide_file)}")
+            log.warning("Moved to cannot_open folder: %s", os.path.basename(slide_file))
         except Exception as move_error:
-            print(f"Error moving file: {move_error}")
+            log.error("Error moving file: %s", move_error)
         return None
 
 
+def _load_label_image(slide_file: str) -> Tuple[Image.Image, bool, str]:
+    """Decode the label image of a slide. Returns (image, is_direct_label, source)."""
+    with closing(_open_slide(slide_file)) as slide:
+        log.debug("Slide levels available: %s", slide.level_count)
+        log.debug("Level dimensions: %s", slide.level_dimensions)
+        log.debug("Associated images: %s", list(slide.associated_images.keys()))
+        
+        # Method 1: Direct label image (no cropping needed)
+        # Method 2: 'macro' image (contains the full slide and needs cropping)
+        # Method 3: Other associated images that might be direct labels
+        if 'label' in slide.associated_images:
+            source, is_direct_label = 'label', True
+        elif 'macro' in slide.associated_images:
+            source, is_direct_label = 'macro', False
+        else:
+            source, is_direct_label = _find_label_keyword_image(slide.associated_images), True
+        
+        if source is not None:
+            label_image = slide.associated_images[source]
+        else:
+            # Method 4: Fall back to level 6 overview (requires cropping)
+            log.debug("No direct label image found")
+            label_image = _read_level_overview(slide)
+            source, is_direct_label = LEVEL_OVERVIEW_SOURCE, False
+        
+        # Drop the alpha channel if present
+        return _drop_alpha(label_image), is_direct_label, source
+
+
 def _process_label_image_standalone(image: Image.Image, crop_coords: Optional[Tuple[int, int, int, int]], 
-                                  apply_crop: bool) -> Optional[Image.Image]:
+                                  apply_crop: bool,
+                                  rotation: int = config.DEFAULT_ROTATION_ANGLE) -> Optional[Image.Image]:
     """Standalone version of _process_label_image for parallel processing."""
     try:
-        processed = image.copy()
+        # crop() and transpose()/rotate() return new images, so the input is never mutated
+        processed = image
         
         # Apply crop if coordinates are available and requested
         if apply_crop and crop_coords:
             x1, y1, x2, y2 = crop_coords
             processed = processed.crop((x1, y1, x2, y2))
         
-        # Rotate by configured angle
-        processed = processed.rotate(config.DEFAULT_ROTATION_ANGLE, expand=True)
+        # Rotate by configured angle - right angles are a lossless transpose
+        angle = rotation % 360
+        if angle in _TRANSPOSE_FOR_ANGLE:
+            processed = processed.transpose(_TRANSPOSE_FOR_ANGLE[angle])
+        elif angle:
+            processed = processed.rotate(angle, expand=True)
         
         return processed
         
     except Exception as e:
-        print(f"Error processing label image: {e}")
+        log.error("Error processing label image: %s", e)
         return None
 
 
+def _process_label_array(pixels: np.ndarray, crop_coords: Optional[Tuple[int, int, int, int]],
+                         apply_crop: bool, rotation: int) -> np.ndarray:
+    """Crop and rotate a label array by a multiple of 90 degrees."""
+    if apply_crop and crop_coords:
+        pixels = _crop_label_array(pixels, crop_coords)
+    
+    # PIL rotates counter-clockwise, as does rot90 with positive k
+    return np.rot90(pixels, k=rotation // 90)
+
+
+def _crop_label_array(pixels: np.ndarray, crop_coords: Tuple[int, int, int, int]) -> np.ndarray:
+    """Crop a label array the way Image.crop does: a view when the box lies inside the image."""
+    x1, y1, x2, y2 = (int(v) for v in crop_coords)
+    if x1 >= x2 or y1 >= y2:
+        raise ValueError(f"Empty crop box: {tuple(crop_coords)}")
+    
+    height, width = pixels.shape[:2]
+    if x1 >= 0 and y1 >= 0 and x2 <= width and y2 <= height:
+        return pixels[y1:y2, x1:x2]
+    
+    # Slicing would truncate the box at the edge and wrap negative coordinates; Image.crop pads instead
+    return np.asarray(Image.fromarray(pixels).crop((x1, y1, x2, y2)))
+
+
+def _content_bbox(image: Image.Image, threshold: int = 240) -> Tuple[int, int, int, int]:
+    """Bounding box (x1, y1, x2, y2) of the non-background area of an image."""
+    pixels = _rgb_pixels(image)
+    mask = pixels.min(axis=-1) < threshold
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    
+    if rows.size == 0 or cols.size == 0:
+        return 0, 0, image.width, image.height
+    
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def _clamp_crop_box(crop_coords, width: int, height: int) -> Optional[Tuple[int, int, int, int]]:
+    """Clamp a crop box (x1, y1, x2, y2) to a width x height image, or None if it is inverted or empty."""
+    x1, y1, x2, y2 = (int(v) for v in crop_coords)
+    if x1 >= x2 or y1 >= y2:
+        return None
+    
+    x1, x2 = min(max(x1, 0), width), min(max(x2, 0), width)
+    y1, y2 = min(max(y1, 0), height), min(max(y2, 0), height)
+    if x1 == x2 or y1 == y2:
+        return None
+    
+    return x1, y1, x2, y2
+
+
+def _simplejpeg_usable() -> bool:
+    """Whether simplejpeg can write labels with the configured settings (it has no progressive mode)."""
+    return simplejpeg is not None and not config.LABEL_JPEG_PROGRESSIVE
+
+
+def _save_label_image(image: Image.Image, output_path: Path) -> None:
+    """Save a processed label image as a JPEG with the configured quality, subsampling and mode."""
+    if _simplejpeg_usable():
+        _save_label_array(np.asarray(image), output_path)
+        return
+    
+    partial_path = _partial_label_path(output_path)
+    image.save(partial_path, "JPEG", quality=config.LABEL_JPEG_QUALITY,
+               subsampling=_PIL_SUBSAMPLING[config.LABEL_JPEG_SUBSAMPLING], optimize=False,
+               progressive=config.LABEL_JPEG_PROGRESSIVE)
+    os.replace(partial_path, output_path)
+
+
+def _save_label_array(pixels: np.ndarray, output_path: Path) -> None:
+    """Save an RGB label array as a JPEG (see _save_label_image) with the fastest available encoder."""
+    if _simplejpeg_usable():
+        if pixels.ndim == 2:
+            pixels, colorspace = pixels[..., np.newaxis], 'GRAY'
+        else:
+            colorspace = 'RGB'
+        encoded = simplejpeg.encode_jpeg(np.ascontiguousarray(pixels), quality=config.LABEL_JPEG_QUALITY,
+                                         colorspace=colorspace, colorsubsampling=config.LABEL_JPEG_SUBSAMPLING)
+        _write_label_bytes(encoded, output_path)
+        return
+    
+    try:
+        import cv2
+    except ImportError:
+        _save_label_image(Image.fromarray(pixels), output_path)
+        return
+    
+    # Reversing the channel axis converts RGB to BGR in the same copy that makes the view contiguous
+    if pixels.ndim == 3:
+        pixels = pixels[..., ::-1]
+    pixels = np.ascontiguousarray(pixels)
+    
+    params = [cv2.IMWRITE_JPEG_QUALITY, config.LABEL_JPEG_QUALITY,
+              cv2.IMWRITE_JPEG_OPTIMIZE, 0, cv2.IMWRITE_JPEG_PROGRESSIVE, int(config.LABEL_JPEG_PROGRESSIVE)]
+    if hasattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR'):
+        params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR,
+                   getattr(cv2, f"IMWRITE_JPEG_SAMPLING_FACTOR_{config.LABEL_JPEG_SUBSAMPLING}")]
+    
+    success, encoded = cv2.imencode('.jpg', pixels, params)
+    if not success:
+        raise ValueError(f"JPEG encoding failed for {os.path.basename(output_path)}")
+    
+    # Write the bytes ourselves - cv2.imwrite cannot handle non-ASCII paths on Windows
+    _write_label_bytes(encoded.tobytes(), output_path)
+
+
+def _partial_label_path(output_path: Path) -> Path:
+    """Temporary path a label is written to before it is moved into place."""
+    return Path(output_path).with_name(Path(output_path).name + ".part")
+
+
+def _write_label_bytes(data: bytes, output_path: Path) -> None:
+    """Write an encoded label so an interrupted run never leaves a truncated JPEG behind."""
+    partial_path = _partial_label_path(output_path)
+    with open(partial_path, 'wb') as f:
+        f.write(data)
+    os.replace(partial_path, output_path)
+
+
+def _prefetch_slide_header(slide_file: str) -> None:
+    """Open a slide and list its associated images so its header is in the OS cache for the workers."""
+    try:
+        with closing(_open_slide(slide_file)) as slide:
+            list(slide.associated_images.keys())
+    except Exception:
+        # The worker reports unreadable slides; prefetching is best effort
+        pass
+
+
 def _get_label_filename_standalone(slide_file: str) -> str:
     """Standalone version of _get_label_filename for parallel processing."""
-    base_name = os.path.splitext(os.path.basename(slide_file))[0]
-    return f"{base_name}.jpg"
+    return Path(slide_file).stem + ".jpg"
 
 
 class CropSelector:
     """GUI for manual crop selection on the first image."""
     
-    def __init__(self, image_path: str):
-        self.image_path = image_path
+    def __init__(self, image: Union[Image.Image, str, os.PathLike],
+                 view_box: Optional[Tuple[int, int, int, int]] = None):
         self.crop_coords = None
+        self.view_box = view_box  # Part of the image shown for selection; None shows all of it
+        self.image_size = None  # Size of the whole image, which selections are clamped to
         self.root = None
         self.canvas = None
         self.photo = None
@@ -175,28 +534,29 @@ class CropSelector:
         self.start_y = None
         self.rect_id = None
         self.image_id = None
-        self.original_image = None
+        self.original_image = image
         self.display_scale = 1.0
         
     def select_crop_region(self) -> Optional[Tuple[int, int, int, int]]:
         """Open GUI for crop selection. Returns (x1, y1, x2, y2) or None."""
         try:
-            # Load image
-            print(f"Loading image for crop selection: {self.image_path}")
-            self.original_image = Image.open(self.image_path)
-            print(f"Image loaded successfully: {self.original_image.size}")
+            # Callers holding a decoded label pass it directly; only paths need decoding here
+            if not isinstance(self.original_image, Image.Image):
+                self.original_image = Image.open(self.original_image)
+            self.image_size = self.original_image.size
+            if self.view_box is not None:
+                self.original_image = self.original_image.crop(self.view_box)
+            log.debug("Showing image for crop selection: %s", self.original_image.size)
             
             # Setup and run GUI
             self._setup_gui()
-            print("Crop selection GUI created, waiting for user input...")
+            log.debug("Crop selection GUI created, waiting for user input...")
             self.root.mainloop()
             
-            print(f"GUI closed. Crop coordinates: {self.crop_coords}")
+            log.debug("GUI closed. Crop coordinates: %s", self.crop_coords)
             return self.crop_coords
         except Exception as e:
-            print(f"Error in crop selection: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error in crop selection: %s", e)
             
             # Clean up if GUI was created
             if self.root:
@@ -209,6 +569,10 @@ class CropSelector:
     
     def _setup_gui(self):
         """Setup the crop selection GUI."""
+        # GUI modules are only needed when a crop has to be selected by hand
+        import tkinter as tk
+        from PIL import ImageTk
+        
         self.root = tk.Tk()
         self.root.title("Select LABEL AREA - Crop the label portion from whole slide overview")
         self.root.geometry("900x700")
@@ -229,8 +593,11 @@ class CropSelector:
         scale_y = max_display_height / img_height
         self.display_scale = min(scale_x, scale_y, 1.0)
         
-        display_width = int(img_width * self.display_scale)
-        display_height = int(img_height * self.display_scale)
+        display_width = max(1, int(img_width * self.display_scale))
+        display_height = max(1, int(img_height * self.display_scale))
+        
+        # Use the scale of the rounded preview size so selections map back exactly
+        self.display_scale = display_width / img_width
         
         # Create canvas first
         self.canvas = tk.Canvas(self.root, width=display_width, height=display_height, bg="white")
@@ -239,8 +606,11 @@ class CropSelector:
         # Force GUI update before creating image
         self.root.update_idletasks()
         
-        # Resize image for display and keep strong reference
-        display_image = self.original_image.resize((display_width, display_height), Image.Resampling.LANCZOS)
+        # Resize image for display and keep strong reference.
+        # reducing_gap box-reduces by an integer factor before the bilinear pass - the same
+        # fast path Image.thumbnail() takes, without copying the full-size image first.
+        display_image = self.original_image.resize((display_width, display_height), Image.Resampling.BILINEAR,
+                                                   reducing_gap=2.0)
         
         # Use a more robust approach for PhotoImage creation
         try:
@@ -248,13 +618,13 @@ class CropSelector:
             self.photo = ImageTk.PhotoImage(display_image, master=self.root)
             self.canvas.image = self.photo  # Store reference
             self.image_id = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
-            print("Image displayed successfully in canvas")
+            log.debug("Image displayed successfully in canvas")
             
         except Exception as e1:
-            print(f"Method 1 failed: {e1}")
+            log.warning("Method 1 failed: %s", e1)
             try:
                 # Method 2: Save to temporary file and reload
-                temp_path = os.path.join(os.path.dirname(self.image_path), "temp_display.png")
+                temp_path = os.path.join(tempfile.gettempdir(), "temp_display.png")
                 display_image.save(temp_path, "PNG")
                 
                 # Force a small delay
@@ -264,21 +634,21 @@ class CropSelector:
                 self.photo = ImageTk.PhotoImage(file=temp_path)
                 self.canvas.image = self.photo
                 self.image_id = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
-                print("Image displayed successfully using temp file method")
+                log.debug("Image displayed successfully using temp file method")
                 
                 # Clean up temp file after a delay
                 self.root.after(1000, lambda: self._cleanup_temp_file(temp_path))
                 
             except Exception as e2:
-                print(f"Method 2 failed: {e2}")
+                log.warning("Method 2 failed: %s", e2)
                 try:
                     # Method 3: Use PIL Image directly with tkinter Canvas (no PhotoImage)
                     # Convert PIL image to bytes and use create_image differently
                     self._draw_image_fallback(display_image, display_width, display_height)
-                    print("Using fallback drawing method")
+                    log.debug("Using fallback drawing method")
                     
                 except Exception as e3:
-                    print(f"All methods failed: {e3}")
+                    log.warning("All methods failed: %s", e3)
                     # Show error message in canvas
                     self.canvas.create_text(
                         display_width//2, display_height//2,
@@ -333,97 +703,106 @@ class CropSelector:
     
     def _confirm_crop(self):
         """Confirm the crop selection."""
-        print("Confirm crop button clicked")
+        from tkinter import messagebox
+        
+        log.debug("Confirm crop button clicked")
         
         if self.rect_id is None:
-            print("No crop region selected")
+            log.warning("No crop region selected")
             messagebox.showwarning("Warning", "Please select a crop region first!")
             return
         
         # Get rectangle coordinates
         coords = self.canvas.coords(self.rect_id)
-        print(f"Canvas coordinates: {coords}")
+        log.debug("Canvas coordinates: %s", coords)
         
         if len(coords) != 4:
-            print("Invalid coordinates")
+            log.warning("Invalid coordinates")
             messagebox.showerror("Error", "Invalid crop selection!")
             return
         
-        # Convert display coordinates to original image coordinates
-        x1 = int(coords[0] / self.display_scale)
-        y1 = int(coords[1] / self.display_scale)
-        x2 = int(coords[2] / self.display_scale)
-        y2 = int(coords[3] / self.display_scale)
-        
-        # Ensure coordinates are in correct order
-        x1, x2 = min(x1, x2), max(x1, x2)
-        y1, y2 = min(y1, y2), max(y1, y2)
-        
-        self.crop_coords = (x1, y1, x2, y2)
-        print(f"Setting crop coordinates: {self.crop_coords}")
+        self.crop_coords = self._to_image_coords(coords)
+        log.debug("Setting crop coordinates: %s", self.crop_coords)
         self.root.destroy()
     
+    def _to_image_coords(self, coords) -> Tuple[int, int, int, int]:
+        """Convert canvas rectangle coordinates to ordered original image coordinates inside the image."""
+        width, height = self.image_size
+        offset_x, offset_y = self.view_box[:2] if self.view_box is not None else (0, 0)
+        points = np.round(np.asarray(coords, dtype=np.float64) / self.display_scale).astype(int)
+        points += [offset_x, offset_y, offset_x, offset_y]
+        
+        # Keep off-canvas drags inside the whole image (not just the part shown) so slides are
+        # never padded with black
+        points = np.clip(points, 0, [width, height, width, height])
+        x1, y1 = np.minimum(points[:2], points[2:]).tolist()
+        x2, y2 = np.maximum(points[:2], points[2:]).tolist()
+        return x1, y1, x2, y2
+    
     def _cancel_crop(self):
         """Cancel crop selection."""
-        print("Cancel crop button clicked")
+        log.debug("Cancel crop button clicked")
         self.crop_coords = None
         self.root.destroy()
     
     def _on_window_close(self):
         """Handle window close event (X button)."""
-        print("Window closed with X button - treating as cancel")
+        log.debug("Window closed with X button - treating as cancel")
         self.crop_coords = None
         self.root.destroy()
     
     def _cleanup_temp_file(self, temp_path):
         """Clean up temporary file."""
         try:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-                print(f"Cleaned up temp file: {temp_path}")
+            os.remove(temp_path)
+            log.debug("Cleaned up temp file: %s", temp_path)
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            print(f"Could not clean up temp file {temp_path}: {e}")
+            log.warning("Could not clean up temp file %s: %s", temp_path, e)
     
     def _draw_image_fallback(self, display_image, display_width, display_height):
         """Fallback method to draw image using canvas primitives."""
-        # This is a last resort - draw a representation of the image
-        # Convert image to a simple grid pattern or use canvas drawing
+        import tkinter as tk
         
-        # Create a visual representation using rectangles
-        # Sample the image at regular intervals and draw colored rectangles
+        # This is a last resort - draw a coarse representation of the image
         sample_size = 20  # Size of each sample square
-        cols = display_width // sample_size
-        rows = display_height // sample_size
-        
-        for row in range(rows):
-            for col in range(cols):
-                # Sample pixel from original image
-                sample_x = int((col / cols) * display_image.width)
-                sample_y = int((row / rows) * display_image.height)
-                
-                try:
-                    pixel = display_image.getpixel((sample_x, sample_y))
-                    if isinstance(pixel, tuple) and len(pixel) >= 3:
-                        r, g, b = pixel[:3]
-                        color = f"#{r:02x}{g:02x}{b:02x}"
-                    else:
-                        color = "#808080"  # Gray fallback
-                    
-                    x1 = col * sample_size
-                    y1 = row * sample_size
-                    x2 = x1 + sample_size
-                    y2 = y1 + sample_size
-                    
-                    self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="")
-                    
-                except Exception:
-                    # If pixel sampling fails, use gray
+        cols = -(-display_width // sample_size)
+        rows = -(-display_height // sample_size)
+
+        # Average each grid cell in one vectorized call, or sample it with a strided view
+        pixels = _rgb_pixels(display_image)
+        try:
+            import cv2
+            grid = cv2.resize(pixels, (cols, rows), interpolation=cv2.INTER_AREA)
+        except ImportError:
+            grid = pixels[::sample_size, ::sample_size]
+
+        try:
+            # Hand the grid to Tk as PPM data (no ImageTk needed) and let Tk zoom it to display size
+            header = f"P6 {grid.shape[1]} {grid.shape[0]} 255\n".encode('ascii')
+            ppm_data = base64.b64encode(header + np.ascontiguousarray(grid).tobytes())
+            grid_photo = tk.PhotoImage(master=self.root, data=ppm_data, format='PPM')
+            self.photo = grid_photo.zoom(sample_size)
+            self.canvas.image = self.photo  # Store reference
+            self.image_id = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+            
+        except Exception as e:
+            log.warning("Grid image blit failed, drawing rectangles instead: %s", e)
+            
+            # Encode every sampled colour up front via a byte -> hex lookup
+            colors = [
+                ["#" + _HEX_BYTE[r] + _HEX_BYTE[g] + _HEX_BYTE[b] for r, g, b in row]
+                for row in grid.tolist()
+            ]
+            
+            for row, row_colors in enumerate(colors):
+                y1 = row * sample_size
+                for col, color in enumerate(row_colors):
                     x1 = col * sample_size
-                    y1 = row * sample_size
-                    x2 = x1 + sample_size
-                    y2 = y1 + sample_size
-                    self.canvas.create_rectangle(x1, y1, x2, y2, fill="#808080", outline="")
-        
+                    self.canvas.create_rectangle(x1, y1, x1 + sample_size, y1 + sample_size,
+                                                 fill=color, outline="")
+
         # Add text overlay
         self.canvas.create_text(
             display_width//2, 30,
@@ -435,12 +814,22 @@ class CropSelector:
 class LabelExtractor:
     """Extract and process label images from histology slides."""
     
-    def __init__(self, slide_folder: str):
+    def __init__(self, slide_folder: str, force_reselect: bool = False, force_simple_crop: bool = False):
         self.slide_folder = slide_folder
-        self.label_folder = os.path.join(slide_folder, config.LABEL_FOLDER)
-        self.cannot_open_folder = os.path.join(slide_folder, config.CANNOT_OPEN_FOLDER)
+        self.label_folder = Path(slide_folder) / config.LABEL_FOLDER
+        self.cannot_open_folder = Path(slide_folder) / config.CANNOT_OPEN_FOLDER
+        self.crop_file = Path(slide_folder) / config.CROP_COORDS_FILENAME
+        self.label_crop_file = self.label_folder / config.LABEL_CROP_FILENAME
         self.crop_coords = None
+        self.force_reselect = force_reselect  # Ignore a crop saved by a previous run
+        self.force_simple_crop = force_simple_crop  # Enter crop coordinates instead of dragging on the image
+        self.crop_cancelled = False  # Set when the user closes the crop selector without a selection
         self.batch_size = config.DEFAULT_BATCH_SIZE  # Can be overridden via configuration
+        self._label_source = None  # Image the first slide's label came from
+        self._pool = None  # Worker pool, alive only while the remaining slides are processed
+        self._pool_workers = 0
+        self._log_queue = None  # Carries worker process log records to the listener below
+        self._log_listener = None
         
         # Create output directories
         utils.create_directory(self.label_folder)
@@ -451,43 +840,95 @@ class LabelExtractor:
         slide_files = utils.get_slide_files(self.slide_folder)
         
         if not slide_files:
-            print("No supported slide files found!")
+            log.warning("No supported slide files found!")
             return False
         
-        print(f"Found {len(slide_files)} slide files")
+        log.info("Found %s slide files", len(slide_files))
+        log.debug("Image backend: %s %s", "Pillow-SIMD" if PILLOW_SIMD else "Pillow", PIL.__version__)
         
         # Process first slide for crop selection
         first_slide = slide_files[0]
-        print(f"About to process first slide: {os.path.basename(first_slide)}")
+        log.debug("About to process first slide: %s", os.path.basename(first_slide))
         success = self._process_first_slide(first_slide)
-        print(f"First slide processing returned: {success}")
+        log.debug("First slide processing returned: %s", success)
         
         if not success:
-            print("Failed to process first slide")
+            log.warning("Failed to process first slide")
             return False
         
         # Note: crop_coords will be None if we used direct label extraction (which is fine!)
         if self.crop_coords is None:
-            print("Using direct label extraction - no cropping needed for remaining slides")
+            log.info("Using direct label extraction - no cropping needed for remaining slides")
         else:
-            print(f"Using crop coordinates for remaining slides: {self.crop_coords}")
+            log.info("Using crop coordinates for remaining slides: %s", self.crop_coords)
         
         remaining_slides = slide_files[1:]
         if not remaining_slides:
-            print("Only one slide found - processing complete!")
+            log.info("Only one slide found - processing complete!")
             return True
         
-        print(f"Starting to process remaining {len(remaining_slides)} slides in parallel batches of {self.batch_size}...")
+        # Resume an interrupted run: labels are written atomically, so any existing one is complete.
+        # Only labels written since the current crop took effect are kept; a re-crop redoes them all.
+        crop_since_ns = self._record_label_crop()
+        if self.force_reselect or crop_since_ns is None:
+            existing_labels = set()
+        else:
+            existing_labels = self._existing_label_names(crop_since_ns)
+        pending_slides = [slide_file for slide_file in remaining_slides
+                          if self._get_label_filename(slide_file) not in existing_labels]
+        if len(pending_slides) < len(remaining_slides):
+            log.info("Skipping %s slides that already have a label image", len(remaining_slides) - len(pending_slides))
+        remaining_slides = pending_slides
+        if not remaining_slides:
+            log.info("All remaining slides already have label images - processing complete!")
+            return True
+        
+        log.info("Starting to process remaining %s slides in parallel batches of %s...", len(remaining_slides), self.batch_size)
         
         # Process remaining slides in parallel batches
         self._process_slides_in_batches(remaining_slides)
         
-        print("Label extraction completed!")
+        log.info("Label extraction completed!")
         return True
     
+    def _existing_label_names(self, since_ns: int) -> set:
+        """Names of the label images written since since_ns, from a single directory scan."""
+        try:
+            with os.scandir(self.label_folder) as entries:
+                return {entry.name for entry in entries
+                        if entry.is_file() and entry.stat().st_mtime_ns >= since_ns}
+        except FileNotFoundError:
+            return set()
+    
+    def _record_label_crop(self) -> Optional[int]:
+        """
+        Record the crop the label images are cut with and return when it took effect.
+        
+        The file is only rewritten when the crop changes, so its modification time - taken
+        from the same filesystem clock as the labels - marks the first label cut with it.
+        Returns None if the record cannot be written.
+        """
+        coords = list(self.crop_coords) if self.crop_coords is not None else None
+        try:
+            with open(self.label_crop_file, 'r') as f:
+                if json.load(f)['coords'] == coords:
+                    return os.stat(self.label_crop_file).st_mtime_ns
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.warning("Could not read %s: %s", self.label_crop_file.name, e)
+        
+        try:
+            with open(self.label_crop_file, 'w') as f:
+                json.dump({'coords': coords}, f)
+            return os.stat(self.label_crop_file).st_mtime_ns
+        except OSError as e:
+            log.warning("Could not record the label crop, processing every slide: %s", e)
+            return None
+    
     def _process_first_slide(self, slide_file: str) -> bool:
         """Process the first slide with manual crop selection."""
-        print(f"Processing first slide: {os.path.basename(slide_file)}")
+        log.debug("Processing first slide: %s", os.path.basename(slide_file))
         
         # Extract label image
         result = self._extract_label_image(slide_file)
@@ -498,7 +939,7 @@ class LabelExtractor:
         
         if is_direct_label:
             # We have a direct label image - no cropping needed!
-            print("Using direct label image - skipping crop selection")
+            log.info("Using direct label image - skipping crop selection")
             self.crop_coords = None  # No cropping needed for subsequent slides
             
             # Just rotate and save
@@ -508,78 +949,168 @@ class LabelExtractor:
             
             # Save processed first image
             output_filename = self._get_label_filename(slide_file)
-            output_path = os.path.join(self.label_folder, output_filename)
-            processed_image.save(output_path, "JPEG", quality=90)
+            output_path = self.label_folder / output_filename
+            _save_label_image(processed_image, output_path)
             
-            print(f"First slide processed successfully using direct label (no cropping needed)")
+            log.info("First slide processed successfully using direct label (no cropping needed)")
             return True
         
         else:
             # We have a whole slide overview - need to crop the label area
-            print("Using whole slide overview - crop selection needed")
+            log.info("Using whole slide overview - crop selection needed")
+            
+            # Reuse the crop selected for this folder on a previous run
+            if self.crop_coords is None and not self.force_reselect:
+                saved_crop = self._load_saved_crop()
+                if saved_crop is not None:
+                    # The saved box may come from a different scanner or an edited file
+                    self.crop_coords = _clamp_crop_box(saved_crop, label_image.width, label_image.height)
+                    if self.crop_coords is None:
+                        log.warning("Crop coordinates saved in %s do not fit this %sx%s overview, selecting a new crop region",
+                                    self.crop_file.name, label_image.width, label_image.height)
+                    elif self.crop_coords != saved_crop:
+                        log.warning("Crop coordinates saved in %s clamped to the overview: %s",
+                                    self.crop_file.name, self.crop_coords)
+                    else:
+                        log.info("Using crop coordinates saved in %s", self.crop_file.name)
             
             # Check if crop coordinates are already set (from configuration)
             if self.crop_coords is not None:
-                print(f"Using preset crop coordinates: {self.crop_coords}")
+                if _clamp_crop_box(self.crop_coords, label_image.width, label_image.height) is None:
+                    log.error("Preset crop coordinates %s do not fit this %sx%s overview",
+                              self.crop_coords, label_image.width, label_image.height)
+                    return False
+                log.info("Using preset crop coordinates: %s", self.crop_coords)
             else:
-                print("No preset crop coordinates - prompting user for crop selection")
+                log.info("No preset crop coordinates - prompting user for crop selection")
                 
-                # Save temporary label image for crop selection
-                temp_label_path = os.path.join(self.label_folder, "temp_label.jpg")
-                label_image.save(temp_label_path)
+                # Strip empty slide background so the selector mostly shows slide content. The crop is
+                # applied to every slide and their labels may reach past this slide's content, so keep
+                # a generous margin of background around it.
+                x1, y1, x2, y2 = _content_bbox(label_image)
+                pad_x, pad_y = label_image.width // 4, label_image.height // 4
+                offset_x, offset_y = max(0, x1 - pad_x), max(0, y1 - pad_y)
+                content_x2, content_y2 = min(label_image.width, x2 + pad_x), min(label_image.height, y2 + pad_y)
                 
                 try:
                     # Get crop selection from user
-                    crop_selector = CropSelector(temp_label_path)
-                    self.crop_coords = crop_selector.select_crop_region()
+                    # Coordinate entry lives in the optional simple_crop module
+                    coordinates_available = utils.simple_crop_available()
+                    use_coordinates = self.force_simple_crop and coordinates_available
+                    if self.force_simple_crop and not coordinates_available:
+                        log.warning("Coordinate crop entry is not available (simple_crop.py not found), "
+                                    "using the visual crop selector")
                     
-                    # If PhotoImage-based crop selector failed, try simple method
-                    if self.crop_coords is None:
-                        print("PhotoImage crop selector failed, trying simple coordinate method...")
-                        from simple_crop import SimpleCropSelector
-                        simple_selector = SimpleCropSelector(temp_label_path, label_image.size)
-                        self.crop_coords = simple_selector.select_crop_region()
+                    if not use_coordinates:
+                        # Selections come back in untrimmed overview coordinates
+                        crop_selector = CropSelector(label_image,
+                                                     view_box=(offset_x, offset_y, content_x2, content_y2))
+                        self.crop_coords = crop_selector.select_crop_region()
                     
-                    # Remove temporary file
-                    os.remove(temp_label_path)
+                    # Coordinate entry was requested, or the PhotoImage-based crop selector failed
+                    if self.crop_coords is None and coordinates_available:
+                        if use_coordinates:
+                            log.info("Coordinate crop entry requested, using simple coordinate method...")
+                        else:
+                            log.info("PhotoImage crop selector failed, trying simple coordinate method...")
+                        self.crop_coords = self._select_crop_by_coordinates(label_image)
                     
                     if self.crop_coords is None:
-                        print("Crop selection cancelled")
+                        log.info("Crop selection cancelled")
+                        self.crop_cancelled = True
                         return False
+                    
+                    self._save_crop()
                         
                 except Exception as e:
-                    print(f"Error during crop selection: {e}")
-                    if os.path.exists(temp_label_path):
-                        os.remove(temp_label_path)
+                    log.error("Error during crop selection: %s", e)
                     return False
                 
             # Now apply crop and rotation to first image (regardless of how we got the crop coords)
-            print(f"Proceeding with crop coordinates: {self.crop_coords}")
-            print("Applying crop and rotation to first image...")
+            log.info("Proceeding with crop coordinates: %s", self.crop_coords)
+            log.info("Applying crop and rotation to first image...")
             
             try:
                 processed_image = self._process_label_image(label_image, apply_crop=True)
                 if processed_image is None:
-                    print("Failed to process label image")
+                    log.error("Failed to process label image")
                     return False
                 
-                print("Processed image successfully")
+                log.debug("Processed image successfully")
                 
                 # Save processed first image
                 output_filename = self._get_label_filename(slide_file)
-                output_path = os.path.join(self.label_folder, output_filename)
-                print(f"Saving processed image to: {output_path}")
-                processed_image.save(output_path, "JPEG", quality=90)
+                output_path = self.label_folder / output_filename
+                log.debug("Saving processed image to: %s", output_path)
+                _save_label_image(processed_image, output_path)
                 
-                print(f"First slide processed successfully. Crop region: {self.crop_coords}")
+                log.info("First slide processed successfully. Crop region: %s", self.crop_coords)
                 return True
                 
             except Exception as e:
-                print(f"Error processing first slide: {e}")
+                log.error("Error processing first slide: %s", e)
                 return False
     
+    def _select_crop_by_coordinates(self, label_image: Image.Image) -> Optional[Tuple[int, int, int, int]]:
+        """Ask for crop coordinates on the untrimmed overview with the simple coordinate selector."""
+        from simple_crop import SimpleCropSelector
+        
+        # SimpleCropSelector takes an image path, so it gets a temporary copy of the overview
+        temp_label_path = os.path.join(self.label_folder, "temp_label.jpg")
+        label_image.save(temp_label_path)
+        try:
+            simple_selector = SimpleCropSelector(temp_label_path, label_image.size)
+            return simple_selector.select_crop_region()
+        finally:
+            os.remove(temp_label_path)
+    
+    def _load_saved_crop(self) -> Optional[Tuple[int, int, int, int]]:
+        """Load crop coordinates saved for this folder, or None if there are none."""
+        try:
+            with open(self.crop_file, 'r') as f:
+                x1, y1, x2, y2 = json.load(f)['coords']
+            return int(x1), int(y1), int(x2), int(y2)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning("Could not load saved crop coordinates: %s", e)
+            return None
+    
+    def _save_crop(self):
+        """Save the selected crop coordinates so later runs can skip the crop selector."""
+        try:
+            with open(self.crop_file, 'w') as f:
+                json.dump({'coords': list(self.crop_coords)}, f)
+        except Exception as e:
+            log.warning("Could not save crop coordinates: %s", e)
+    
     def _process_slides_in_batches(self, slide_files: List[str]):
         """Process slides in parallel batches."""
+        prefetcher = None
+        try:
+            # One worker pool for all batches so process startup is paid once
+            self._pool = self._create_worker_pool()
+            
+            # Background reader that warms the next batch's slide headers while the current one runs
+            if config.PREFETCH_SLIDE_HEADERS:
+                prefetcher = ThreadPoolExecutor(max_workers=2)
+            
+            self._run_batches(slide_files, prefetcher)
+        finally:
+            # Stop the prefetcher first, waiting for reads in flight, so no thread still opens
+            # slides once this returns - also when a batch raised
+            if prefetcher is not None:
+                prefetcher.shutdown(wait=True, cancel_futures=True)
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            if self._log_listener is not None:
+                self._log_listener.stop()
+                self._log_listener = None
+                self._log_queue = None
+    
+    def _run_batches(self, slide_files: List[str], prefetcher: Optional[ThreadPoolExecutor]):
+        """Feed slides to the worker pool batch by batch and report progress."""
         batch_size = self.batch_size
         total_slides = len(slide_files)
         successful = 0
@@ -592,7 +1123,12 @@ class LabelExtractor:
             current_batch = batch_start // batch_size + 1
             total_batches = (total_slides + batch_size - 1) // batch_size
             
-            print(f"\nProcessing batch {current_batch}/{total_batches} ({len(batch)} slides)...")
+            log.info("Processing batch %s/%s (%s slides)...", current_batch, total_batches, len(batch))
+            
+            # Only ever read one batch ahead so prefetching stays bounded
+            if prefetcher is not None:
+                for next_slide in slide_files[batch_end:batch_end + batch_size]:
+                    prefetcher.submit(_prefetch_slide_header, next_slide)
             
             # Process this batch in parallel
             batch_results = self._process_batch_parallel(batch)
@@ -604,47 +1140,66 @@ class LabelExtractor:
             successful += batch_successful
             failed += batch_failed
             
-            print(f"Batch {current_batch} complete: {batch_successful} successful, {batch_failed} failed")
+            log.info("Batch %s complete: %s successful, %s failed", current_batch, batch_successful, batch_failed)
             
-            # Print individual results
+            # Log individual results - failures always surface
             for filename, success, message in batch_results:
-                status = "✓" if success else "✗"
-                print(f"  {status} {filename}: {message}")
+                if success:
+                    log.debug("  ✓ %s: %s", filename, message)
+                else:
+                    log.warning("  ✗ %s: %s", filename, message)
         
-        print(f"\nAll batches complete! Total: {successful} successful, {failed} failed")
+        log.info("All batches complete! Total: %s successful, %s failed", successful, failed)
     
     def _process_batch_parallel(self, batch_slides: List[str]) -> List[Tuple[str, bool, str]]:
         """Process a batch of slides in parallel."""
-        # Create partial function with fixed parameters
-        process_func = partial(
-            process_slide_parallel,
-            crop_coords=self.crop_coords,
-            label_folder=self.label_folder,
-            cannot_open_folder=self.cannot_open_folder
-        )
+        # Pass every parameter explicitly so workers never depend on pickled state of self
+        worker_args = [
+            (slide_file, self.label_folder, self.cannot_open_folder, self.crop_coords,
+             config.DEFAULT_ROTATION_ANGLE, self._label_source)
+            for slide_file in batch_slides
+        ]
+        
+        # Hand each worker a few slides at a time to amortize task dispatch overhead
+        chunksize = max(1, len(batch_slides) // (self._pool_workers * 4))
         
         results = []
         
-        # Use ProcessPoolExecutor for parallel processing
-        with ProcessPoolExecutor(max_workers=min(len(batch_slides), os.cpu_count() or 1)) as executor:
-            # Submit all tasks
-            future_to_slide = {
-                executor.submit(process_func, slide_file): slide_file 
-                for slide_file in batch_slides
-            }
-            
-            # Collect results as they complete
-            for future in as_completed(future_to_slide):
-                slide_file = future_to_slide[future]
-                try:
-                    result = future.result()
-                    results.append(result)
-                except Exception as e:
-                    filename = os.path.basename(slide_file)
-                    results.append((filename, False, f"Exception: {str(e)}"))
+        try:
+            for result in self._pool.map(_process_slide_worker, worker_args, chunksize=chunksize):
+                results.append(result)
+        except Exception as e:
+            # A worker crashed - report the slides that never produced a result
+            for slide_file in batch_slides[len(results):]:
+                filename = os.path.basename(slide_file)
+                results.append((filename, False, f"Exception: {str(e)}"))
+            
+            # A crashed worker breaks the pool; replace it for the remaining batches
+            if isinstance(e, BrokenProcessPool):
+                self._pool.shutdown(wait=False)
+                self._pool = self._create_worker_pool()
         
         return results
     
+    def _create_worker_pool(self) -> Executor:
+        """Create the worker pool used for the remaining slides."""
+        self._pool_workers = min(self.batch_size, os.cpu_count() or 1)
+        
+        # Direct labels are read, rotated and encoded almost entirely in C code that
+        # releases the GIL, so threads scale without any process startup or pickling
+        if self.crop_coords is None:
+            return ThreadPoolExecutor(max_workers=self._pool_workers)
+        
+        # Worker log records are funnelled through one queue and written by a single listener thread
+        if self._log_listener is None:
+            self._log_queue = multiprocessing.Queue()
+            self._log_listener = QueueListener(self._log_queue, *(logging.getLogger().handlers or [logging.lastResort]),
+                                               respect_handler_level=True)
+            self._log_listener.start()
+        
+        return ProcessPoolExecutor(max_workers=self._pool_workers,
+                                   initializer=_worker_init, initargs=(self._log_queue, log.getEffectiveLevel()))
+    
     def _process_slide(self, slide_file: str, apply_crop: bool = False):
         """Process a single slide file."""
         try:
@@ -668,99 +1223,53 @@ class LabelExtractor:
             
             # Save processed image
             output_filename = self._get_label_filename(slide_file)
-            output_path = os.path.join(self.label_folder, output_filename)
-            processed_image.save(output_path, "JPEG", quality=90)
+            output_path = self.label_folder / output_filename
+            _save_label_image(processed_image, output_path)
             
             method = "direct label" if is_direct_label else "cropped overview"
-            print(f"Label extracted ({method}): {output_filename}")
+            log.debug("Label extracted (%s): %s", method, output_filename)
             
         except Exception as e:
-            print(f"Error processing {os.path.basename(slide_file)}: {e}")
+            log.error("Error processing %s: %s", os.path.basename(slide_file), e)
     
     def _extract_label_image(self, slide_file: str) -> Optional[Tuple[Image.Image, bool]]:
         """Extract label image - try direct label first, then fall back to level 6 overview."""
         try:
-            # Try to open slide
-            slide = openslide.OpenSlide(slide_file)
-            
-            print(f"Slide levels available: {slide.level_count}")
-            print(f"Level dimensions: {slide.level_dimensions}")
-            print(f"Associated images: {list(slide.associated_images.keys())}")
-            
-            # Method 1: Try to get direct label image (best option!)
-            if 'label' in slide.associated_images:
-                print("Found direct label image - extracting without cropping needed!")
-                label_image = slide.associated_images['label']
-                
-                # Convert RGBA to RGB if needed
-                if label_image.mode == 'RGBA':
-                    label_image = label_image.convert('RGB')
-                
-                slide.close()
-                print(f"Successfully extracted direct label image: {label_image.size}")
-                return label_image, True  # True means no cropping needed
-            
-            # Method 2: Check for 'macro' image specifically (needs cropping)
-            if 'macro' in slide.associated_images:
-                print(f"Found 'macro' image - this contains the full slide and needs cropping")
-                label_image = slide.associated_images['macro']
-                
-                # Convert RGBA to RGB if needed
-                if label_image.mode == 'RGBA':
-                    label_image = label_image.convert('RGB')
-                
-                slide.close()
-                print(f"Successfully extracted 'macro' image: {label_image.size}")
-                return label_image, False  # False means cropping IS needed
+            label_image, is_direct_label, source = _load_label_image(slide_file)
+            self._label_source = source
             
-            # Method 3: Check for other associated images that might be direct labels
-            for assoc_name in slide.associated_images.keys():
-                if any(keyword in assoc_name.lower() for keyword in ['label', 'overview']) and assoc_name != 'macro':
-                    print(f"Found potential direct label image '{assoc_name}' - extracting...")
-                    label_image = slide.associated_images[assoc_name]
-                    
-                    # Convert RGBA to RGB if needed
-                    if label_image.mode == 'RGBA':
-                        label_image = label_image.convert('RGB')
-                    
-                    slide.close()
-                    print(f"Successfully extracted '{assoc_name}' image: {label_image.size}")
-                    return label_image, True  # True means no cropping needed
-            
-            # Method 4: Fall back to level 6 overview (requires cropping)
-            print("No direct label image found - using level 6 overview (will need cropping)")
-            target_level = min(6, slide.level_count - 1)
-            print(f"Using level {target_level} for whole slide overview")
-            
-            # Get dimensions for the target level
-            level_dims = slide.level_dimensions[target_level]
-            print(f"Level {target_level} dimensions: {level_dims}")
-            
-            # Read the entire level - this contains BOTH tissue and label areas
-            whole_image = slide.read_region((0, 0), target_level, level_dims)
-            
-            # Convert RGBA to RGB if needed
-            if whole_image.mode == 'RGBA':
-                whole_image = whole_image.convert('RGB')
-            
-            slide.close()
-            print(f"Successfully extracted whole slide overview: {whole_image.size}")
-            return whole_image, False  # False means cropping IS needed
+            if is_direct_label:
+                log.debug("Successfully extracted direct label image '%s': %s", source, label_image.size)
+            else:
+                log.debug("Successfully extracted %s (will need cropping): %s", source, label_image.size)
+            return label_image, is_direct_label
             
         except Exception as e:
-            print(f"Cannot open slide {os.path.basename(slide_file)}: {e}")
+            log.warning("Cannot open slide %s: %s", os.path.basename(slide_file), e)
             # Move to cannot_open folder
             try:
                 utils.move_file(slide_file, self.cannot_open_folder)
-                print(f"Moved to cannot_open folder: {os.path.basename(slide_file)}")
+                log.warning("Moved to cannot_open folder: %s", os.path.basename(slide_file))
             except Exception as move_error:
-                print(f"Error moving file: {move_error}")
+                log.error("Error moving file: %s", move_error)
             return None
     
     def _process_label_image(self, image: Image.Image, apply_crop: bool) -> Optional[Image.Image]:
         """Process label image (crop and rotate)."""
         try:
-            processed = image.copy()
+            angle = config.DEFAULT_ROTATION_ANGLE
+            
+            if angle % 90 == 0:
+                # Quarter turns: crop is a view and rot90 does the only copy
+                pixels = np.asarray(image)
+                
+                if apply_crop and self.crop_coords:
+                    pixels = _crop_label_array(pixels, self.crop_coords)
+                
+                # PIL rotates counter-clockwise, as does rot90 with positive k
+                return Image.fromarray(np.rot90(pixels, k=angle // 90))
+            
+            processed = image
             
             # Apply crop if coordinates are available and requested
             if apply_crop and self.crop_coords:
@@ -768,42 +1277,42 @@ class LabelExtractor:
                 processed = processed.crop((x1, y1, x2, y2))
             
             # Rotate by configured angle
-            processed = processed.rotate(config.DEFAULT_ROTATION_ANGLE, expand=True)
+            processed = processed.rotate(angle, expand=True)
             
             return processed
             
         except Exception as e:
-            print(f"Error processing label image: {e}")
+            log.error("Error processing label image: %s", e)
             return None
     
     def _get_label_filename(self, slide_file: str) -> str:
         """Generate label image filename from slide filename."""
-        base_name = os.path.splitext(os.path.basename(slide_file))[0]
-        return f"{base_name}.jpg"
+        return _get_label_filename_standalone(slide_file)
 
 
-def run_phase1(slide_folder: str) -> bool:
+def run_phase1(slide_folder: str, force_reselect: bool = False, force_simple_crop: bool = False) -> bool:
     """Run Phase 1: Label Image Extraction."""
     if not os.path.exists(slide_folder):
-        print(f"Slide folder does not exist: {slide_folder}")
+        log.error("Slide folder does not exist: %s", slide_folder)
         return False
     
-    extractor = LabelExtractor(slide_folder)
+    extractor = LabelExtractor(slide_folder, force_reselect=force_reselect, force_simple_crop=force_simple_crop)
     return extractor.extract_all_labels()
 
 
 def run_phase1_with_config(slide_folder: str, config_data: dict) -> bool:
     """Run Phase 1: Label Image Extraction with configuration."""
     if not os.path.exists(slide_folder):
-        print(f"Slide folder does not exist: {slide_folder}")
+        log.error("Slide folder does not exist: %s", slide_folder)
         return False
     
-    print(f"Running Phase 1 with configuration:")
-    print(f"  - Use default crop: {config_data.get('use_default_crop', True)}")
-    print(f"  - Batch size: {config_data.get('batch_size', config.DEFAULT_BATCH_SIZE)}")
+    log.info("Running Phase 1 with configuration:")
+    log.info("  - Use default crop: %s", config_data.get('use_default_crop', True))
+    log.info("  - Batch size: %s", config_data.get('batch_size', config.DEFAULT_BATCH_SIZE))
     
-    # Create extractor with configuration
-    extractor = LabelExtractor(slide_folder)
+    # Create extractor with configuration; choosing manual crop selection means a new selection,
+    # not the one saved by a previous run
+    extractor = LabelExtractor(slide_folder, force_reselect=not config_data.get('use_default_crop', True))
     
     # Configure batch size
     if 'batch_size' in config_data:
@@ -813,10 +1322,10 @@ def run_phase1_with_config(slide_folder: str, config_data: dict) -> bool:
     if config_data.get('use_default_crop', True):
         # Use the default crop coordinates
         extractor.crop_coords = config_data.get('crop_coords', [10, 13, 578, 732])
-        print(f"  - Using default crop coordinates: {extractor.crop_coords}")
+        log.info("  - Using default crop coordinates: %s", extractor.crop_coords)
     else:
         # Let user select crop region manually (existing behavior)
-        print("  - Manual crop selection will be prompted")
+        log.info("  - Manual crop selection will be prompted")
         extractor.crop_coords = None
     
     return extractor.extract_all_labels()
@@ -825,6 +1334,7 @@ def run_phase1_with_config(slide_folder: str, config_data: dict) -> bool:
 if __name__ == "__main__":
     # For testing
     import sys
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     if len(sys.argv) > 1:
         folder_path = sys.argv[1]
         run_phase1(folder_path)
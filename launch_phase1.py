@@ -1,36 +1,20 @@
 """Smart launcher for Phase 1 that handles PhotoImage issues."""
 
+import logging
 import sys
 import os
 import tkinter as tk
 from tkinter import messagebox, filedialog
 import traceback
 
-def test_photoimage():
-    """Test if PhotoImage works in this environment."""
-    try:
-        from PIL import Image, ImageTk
-        
-        # Create a simple test image
-        test_img = Image.new('RGB', (100, 100), color='red')
-        
-        # Try to create PhotoImage
-        root = tk.Tk()
-        root.withdraw()  # Hide window
-        
-        photo = ImageTk.PhotoImage(test_img)
-        
-        # Try to create canvas and display image
-        canvas = tk.Canvas(root, width=100, height=100)
-        canvas.create_image(0, 0, anchor=tk.NW, image=photo)
-        
-        root.destroy()
+import utils
+
+def test_photoimage(force_probe=False):
+    """Test if PhotoImage works in this environment (cached between launches)."""
+    works = utils.photoimage_works(force_probe=force_probe)
+    if works:
         print("PhotoImage test passed")
-        return True
-        
-    except Exception as e:
-        print(f"PhotoImage test failed: {e}")
-        return False
+    return works
 
 def choose_crop_method():
     """Let user choose crop method."""
@@ -86,9 +70,13 @@ def launch_phase1():
     print("Histology Slide Renaming Tool - Phase 1 Launcher")
     print("=" * 50)
     
+    # --force-probe re-runs the PhotoImage test instead of using the cached result
+    force_probe = '--force-probe' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--force-probe']
+    
     # Get folder path
-    if len(sys.argv) > 1:
-        folder_path = sys.argv[1]
+    if args:
+        folder_path = args[0]
     else:
         root = tk.Tk()
         root.withdraw()
@@ -110,12 +98,16 @@ def launch_phase1():
     
     # Test PhotoImage capability
     print("\\nTesting image display capabilities...")
-    photoimage_works = test_photoimage()
+    photoimage_works = test_photoimage(force_probe)
     
     # Choose method based on test results
     if photoimage_works:
         print("Visual crop selection should work. Proceeding with standard method...")
         crop_method = "visual"
+    elif not utils.simple_crop_available():
+        print("PhotoImage issues detected, but coordinate entry (simple_crop.py) is not installed.")
+        print("Trying visual crop selection anyway...")
+        crop_method = "visual"
     else:
         print("PhotoImage issues detected. Recommend using coordinate entry method.")
         crop_method = choose_crop_method()
@@ -126,12 +118,10 @@ def launch_phase1():
     
     print(f"Using crop method: {crop_method}")
     
-    # Note: The label extractor will handle coordinate method automatically
-    
     # Import and run Phase 1
     try:
         import label_extractor
-        success = label_extractor.run_phase1(folder_path)
+        success = label_extractor.run_phase1(folder_path, force_simple_crop=(crop_method == "coordinate"))
         
         if success:
             print("\\nPhase 1 completed successfully!")
@@ -147,4 +137,5 @@ def launch_phase1():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     launch_phase1()
\ No newline at end of file
@@ -9,23 +9,52 @@ Usage:
     python main.py                    # Auto-detect and run appropriate phase (default)
     python main.py <folder>           # Auto-detect for specific folder
     python main.py --phase1 <folder> # Run only Phase 1
+    python main.py --phase1 <folder> --re-crop  # Run Phase 1, reselecting the crop region
     python main.py --phase2           # Run only Phase 2
     python main.py --gui              # Start with GUI selector
 """
 
 import argparse
+import logging
 import os
+import subprocess
 import sys
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import traceback
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Set
 
-# Import application modules
+# Import application modules; the phase modules (OpenSlide, NumPy, pandas) are
+# imported inside the functions that run them so each entry point loads only what it uses
 import config
-import label_extractor
-import renaming_gui
 import utils
-import setup_screen
+
+log = logging.getLogger(__name__)
+
+
+def _list_label_bases(label_folder: str) -> Optional[Set[str]]:
+    """Casefolded base names of the usable JPEG files in the label folder, or None if it does not exist."""
+    try:
+        # One directory scan instead of checking for each expected label separately;
+        # skipped names are dropped here so the per-slide check is a set lookup only.
+        # Names are casefolded because the target filesystems (Windows) ignore case.
+        with os.scandir(label_folder) as entries:
+            return {entry.name[:-4].casefold() for entry in entries
+                    if entry.name.lower().endswith('.jpg') and not utils.should_skip_file(entry.name)}
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def _preload_phase2():
+    """Import the Phase 2 modules in the background so they are loaded by the time Phase 1 ends."""
+    def _import_phase2():
+        try:
+            import renaming_gui  # noqa: F401
+        except Exception:
+            pass  # The import at the point of use reports the error
+    
+    threading.Thread(target=_import_phase2, daemon=True).start()
 
 
 def detect_required_phase(folder_path: str) -> str:
@@ -40,11 +69,19 @@ def detect_required_phase(folder_path: str) -> str:
         'phase2' if files are ready for renaming
         'none' if no WSI files found
     """
-    if not os.path.exists(folder_path):
-        return 'none'
+    label_folder = os.path.join(folder_path, config.LABEL_FOLDER)
+    
+    # The two directory listings are independent, so overlap them (noticeable on network shares)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        label_bases_future = executor.submit(_list_label_bases, label_folder)
+        
+        # Get WSI files in the main directory; listing it also tells us whether it exists
+        try:
+            wsi_files = utils.get_slide_files(folder_path)
+        except (FileNotFoundError, NotADirectoryError):
+            return 'none'
+        label_bases = label_bases_future.result()
     
-    # Get WSI files in the main directory
-    wsi_files = utils.get_slide_files(folder_path)
     wsi_count = len(wsi_files)
     
     if wsi_count == 0:
@@ -52,9 +89,7 @@ def detect_required_phase(folder_path: str) -> str:
         return 'none'
     
     # Check for label image directory
-    label_folder = os.path.join(folder_path, config.LABEL_FOLDER)
-    
-    if not os.path.exists(label_folder):
+    if label_bases is None:
         print(f"Found {wsi_count} WSI files and 0 label images")
         print("Need to extract labels - starting Phase 1 (Label extraction)")
         return 'phase1'
@@ -64,10 +99,13 @@ def detect_required_phase(folder_path: str) -> str:
     missing_labels = []
     
     for wsi_file in wsi_files:
-        wsi_base = os.path.splitext(os.path.basename(wsi_file))[0]
-        expected_label = os.path.join(label_folder, f"{wsi_base}.jpg")
+        # Slide paths always end in <name>.<ext>, so plain str.rpartition replaces basename + splitext
+        wsi_name = wsi_file.rpartition(os.sep)[2]
+        if os.altsep:
+            wsi_name = wsi_name.rpartition(os.altsep)[2]
+        wsi_base = wsi_name.rpartition('.')[0]
         
-        if os.path.exists(expected_label) and not utils.should_skip_file(f"{wsi_base}.jpg"):
+        if wsi_base.casefold() in label_bases:
             matched_pairs += 1
         else:
             missing_labels.append(wsi_base)
@@ -90,7 +128,9 @@ def detect_required_phase(folder_path: str) -> str:
 class MainSelector:
     """GUI for selecting which phase to run."""
     
-    def __init__(self):
+    def __init__(self, force_probe: bool = False):
+        self.force_probe = force_probe
+        self._photoimage_works = None  # Result of the PhotoImage probe, filled in on first use
         self.root = tk.Tk()
         self.root.title("Histology Slide Renaming Tool")
         
@@ -268,6 +308,8 @@ Choose how you'd like to proceed:"""
     
     def _run_phase1(self):
         """Run Phase 1 with folder selection."""
+        import label_extractor
+        
         folder_path = filedialog.askdirectory(
             title="Select Folder with Slide Files",
             initialdir=os.getcwd()
@@ -278,27 +320,17 @@ Choose how you'd like to proceed:"""
         
         # Check for PhotoImage issues and offer solutions
         self.status_var.set("Checking system compatibility...")
-        self.root.update()
+        self.root.update_idletasks()
         
-        try:
-            # Test PhotoImage functionality
-            from PIL import Image, ImageTk
-            test_img = Image.new('RGB', (100, 100), color='red')
-            test_root = tk.Toplevel(self.root)
-            test_root.withdraw()
-            test_photo = ImageTk.PhotoImage(test_img)
-            test_canvas = tk.Canvas(test_root, width=100, height=100)
-            test_canvas.create_image(0, 0, anchor=tk.NW, image=test_photo)
-            test_root.destroy()
-            photoimage_works = True
-            
-        except Exception as e:
-            photoimage_works = False
-            print(f"PhotoImage test failed: {e}")
+        # Probe once per session; later clicks reuse the answer
+        if self._photoimage_works is None:
+            self._photoimage_works = utils.photoimage_works(self.root, force_probe=self.force_probe)
+        photoimage_works = self._photoimage_works
         
         # Inform user about crop selection method
-        if not photoimage_works:
-            result = messagebox.askyesno(
+        use_coordinates = False
+        if not photoimage_works and utils.simple_crop_available():
+            use_coordinates = messagebox.askyesno(
                 "Crop Selection Method",
                 "Visual crop selection may not work with your Python installation.\\n\\n"
                 "Would you like to use coordinate-based crop selection instead?\\n\\n"
@@ -306,7 +338,7 @@ Choose how you'd like to proceed:"""
                 "NO: Try visual selection anyway"
             )
             
-            if result:
+            if use_coordinates:
                 # Use coordinate-based method
                 messagebox.showinfo(
                     "Coordinate Method",
@@ -315,17 +347,21 @@ Choose how you'd like to proceed:"""
                     "and you can enter pixel coordinates for the crop region."
                 )
         
+        force_reselect = self._ask_reselect_crop(folder_path)
+        
         self.status_var.set("Running Phase 1: Label extraction...")
-        self.root.update()
+        self.root.update_idletasks()
         
+        offer_fallback = False
         try:
-            success = label_extractor.run_phase1(folder_path)
+            extractor = label_extractor.LabelExtractor(folder_path, force_reselect=force_reselect,
+                                                       force_simple_crop=use_coordinates)
+            success = extractor.extract_all_labels()
             
             if success:
                 self.status_var.set("Phase 1 completed successfully!")
-                messagebox.showinfo(
-                    "Success", 
-                    f"Label extraction completed!\\n\\nLabel images saved to:\\n{os.path.join(folder_path, config.LABEL_FOLDER)}"
+                self._toast(
+                    f"Label extraction completed!\n\nLabel images saved to:\n{os.path.join(folder_path, config.LABEL_FOLDER)}"
                 )
             else:
                 self.status_var.set("Phase 1 failed!")
@@ -338,37 +374,82 @@ Choose how you'd like to proceed:"""
                            "Alternative: Try running:\\n"
                            "python launch_phase1.py")
                 messagebox.showerror("Error", error_msg)
+                # Relaunching cannot help when there is nothing to process or the user cancelled
+                offer_fallback = not extractor.crop_cancelled and bool(utils.get_slide_files(folder_path))
         
         except Exception as e:
             self.status_var.set("Phase 1 error!")
             error_msg = f"Phase 1 error: {str(e)}\\n\\nFor PhotoImage-related errors, try:\\npython launch_phase1.py"
             messagebox.showerror("Error", error_msg)
-            print(f"Phase 1 error: {traceback.format_exc()}")
+            log.exception("Phase 1 error")
+            offer_fallback = True
+        
+        if offer_fallback:
+            self._offer_fallback_launcher(folder_path)
+    
+    def _ask_reselect_crop(self, folder_path: str) -> bool:
+        """Ask whether to replace the crop region saved for this folder by a previous run."""
+        if not os.path.isfile(os.path.join(folder_path, config.CROP_COORDS_FILENAME)):
+            return False
+        
+        return not messagebox.askyesno(
+            "Saved Crop Region",
+            "A crop region was saved for this folder by a previous run.\n\n"
+            "YES: Reuse the saved crop region\n"
+            "NO: Select a new crop region"
+        )
+    
+    def _offer_fallback_launcher(self, folder_path: str):
+        """Offer to retry Phase 1 for the same folder with launch_phase1.py."""
+        if not messagebox.askyesno("Retry", "Retry Phase 1 for this folder with launch_phase1.py?"):
+            return
+        
+        launcher = os.path.join(os.path.dirname(os.path.abspath(__file__)), "launch_phase1.py")
+        try:
+            subprocess.Popen([sys.executable, launcher, folder_path])
+        except OSError as e:
+            log.exception("Could not start launch_phase1.py")
+            messagebox.showerror("Error", f"Could not start launch_phase1.py: {e}")
+            return
+        self.status_var.set("Phase 1 restarted with launch_phase1.py")
     
     def _run_phase2(self):
         """Run Phase 2 GUI."""
+        # No folder pre-loading for manual phase selection
+        self._launch_phase2()
+    
+    def _launch_phase2(self, folder_path: Optional[str] = None,
+                       done_message: str = "Phase 2 completed"):
+        """Hide the selector, run the Phase 2 GUI and restore the selector when it closes.
+        
+        Tk is not thread-safe, so Phase 2 runs on the main thread like the selector itself.
+        """
+        import renaming_gui
+        
         self.status_var.set("Starting Phase 2...")
-        self.root.update()
+        self.root.update_idletasks()
         
         try:
-            # Close selector window
             self.root.withdraw()
             
-            # Run Phase 2 GUI (no folder pre-loading for manual phase selection)
-            renaming_gui.run_phase2()
+            if folder_path:
+                renaming_gui.RenamingGUI(folder_path).run()
+            else:
+                renaming_gui.run_phase2()
             
-            # Show selector again when Phase 2 is closed
             self.root.deiconify()
-            self.status_var.set("Phase 2 completed")
+            self.status_var.set(done_message)
         
         except Exception as e:
             self.root.deiconify()
             self.status_var.set("Phase 2 error!")
             messagebox.showerror("Error", f"Phase 2 error: {str(e)}")
-            print(f"Phase 2 error: {traceback.format_exc()}")
+            log.exception("Phase 2 error")
     
     def _run_auto_detect(self):
         """Auto-detect which phase to run and execute it."""
+        import label_extractor
+        
         folder_path = filedialog.askdirectory(
             title="Select Folder with Slide Files",
             initialdir=os.getcwd()
@@ -378,7 +459,7 @@ Choose how you'd like to proceed:"""
             return
         
         self.status_var.set("Analyzing directory...")
-        self.root.update()
+        self.root.update_idletasks()
         
         try:
             required_phase = detect_required_phase(folder_path)
@@ -390,14 +471,16 @@ Choose how you'd like to proceed:"""
             
             elif required_phase == 'phase1':
                 self.status_var.set("Running Phase 1...")
-                self.root.update()
+                self.root.update_idletasks()
                 
                 # Run Phase 1
-                success = label_extractor.run_phase1(folder_path)
+                force_reselect = self._ask_reselect_crop(folder_path)
+                _preload_phase2()
+                success = label_extractor.run_phase1(folder_path, force_reselect=force_reselect)
                 
                 if success:
                     self.status_var.set("Phase 1 completed. Starting Phase 2...")
-                    self.root.update()
+                    self.root.update_idletasks()
                     
                     # Automatically continue to Phase 2
                     self.root.after(1000, lambda: self._continue_phase2(folder_path))
@@ -406,24 +489,18 @@ Choose how you'd like to proceed:"""
                     messagebox.showerror("Error", "Phase 1 failed. Check console for details.")
             
             elif required_phase == 'phase2':
-                self.status_var.set("Starting Phase 2...")
-                self.root.update()
-                
                 # Run Phase 2 directly with pre-loaded folder
-                self.root.withdraw()
-                app = renaming_gui.RenamingGUI(folder_path)
-                app.run()
-                
-                self.root.deiconify()
-                self.status_var.set("Phase 2 completed")
+                self._launch_phase2(folder_path)
         
         except Exception as e:
             self.status_var.set("Auto-detect error!")
             messagebox.showerror("Error", f"Auto-detect error: {str(e)}")
-            print(f"Auto-detect error: {traceback.format_exc()}")
+            log.exception("Auto-detect error")
     
     def _run_both_phases(self):
         """Run complete workflow."""
+        import label_extractor
+        
         result = messagebox.askyesno(
             "Complete Workflow",
             "This will run both phases in sequence:\\n\\n1. Extract label images from slides\\n2. Open renaming GUI\\n\\nContinue?"
@@ -441,11 +518,14 @@ Choose how you'd like to proceed:"""
         if not folder_path:
             return
         
+        force_reselect = self._ask_reselect_crop(folder_path)
+        
         self.status_var.set("Running Phase 1...")
-        self.root.update()
+        self.root.update_idletasks()
         
         try:
-            success = label_extractor.run_phase1(folder_path)
+            _preload_phase2()
+            success = label_extractor.run_phase1(folder_path, force_reselect=force_reselect)
             
             if not success:
                 self.status_var.set("Workflow stopped - Phase 1 failed!")
@@ -453,7 +533,7 @@ Choose how you'd like to proceed:"""
                 return
             
             self.status_var.set("Phase 1 completed. Starting Phase 2...")
-            self.root.update()
+            self.root.update_idletasks()
             
             # Small delay to show status
             self.root.after(1000, lambda: self._continue_phase2(folder_path))
@@ -461,12 +541,12 @@ Choose how you'd like to proceed:"""
         except Exception as e:
             self.status_var.set("Workflow error!")
             messagebox.showerror("Error", f"Workflow error: {str(e)}")
-            print(f"Workflow error: {traceback.format_exc()}")
+            log.exception("Workflow error")
     
     def _run_setup_workflow(self):
         """Run the setup-guided workflow."""
         self.status_var.set("Starting setup...")
-        self.root.update()
+        self.root.update_idletasks()
         
         try:
             # Hide selector window during setup
@@ -487,43 +567,45 @@ Choose how you'd like to proceed:"""
             self.root.deiconify()
             self.status_var.set("Setup workflow error!")
             messagebox.showerror("Error", f"Setup workflow error: {str(e)}")
-            print(f"Setup workflow error: {traceback.format_exc()}")
+            log.exception("Setup workflow error")
     
     def _continue_phase2(self, folder_path):
         """Continue to Phase 2 after Phase 1 completion."""
-        try:
-            # Close selector window
-            self.root.withdraw()
-            
-            # Create and run Phase 2 GUI with pre-loaded folder
-            app = renaming_gui.RenamingGUI(folder_path)
-            app.run()
-            
-            # Show selector again when Phase 2 is closed
-            self.root.deiconify()
-            self.status_var.set("Complete workflow finished!")
-            
-        except Exception as e:
-            self.root.deiconify()
-            self.status_var.set("Phase 2 error!")
-            messagebox.showerror("Error", f"Phase 2 error: {str(e)}")
-            print(f"Phase 2 error: {traceback.format_exc()}")
+        self._launch_phase2(folder_path, done_message="Complete workflow finished!")
+    
+    def _toast(self, message: str, duration_ms: int = 3000):
+        """Show a non-modal notification over the selector that closes itself."""
+        toast = tk.Toplevel(self.root)
+        toast.overrideredirect(True)
+        tk.Label(toast, text=message, bg="#4CAF50", fg="white",
+                 font=("Arial", 10), padx=15, pady=10, justify=tk.LEFT).pack()
+        
+        # Place it centred near the bottom of the selector window
+        toast.update_idletasks()
+        x = self.root.winfo_rootx() + (self.root.winfo_width() - toast.winfo_reqwidth()) // 2
+        y = self.root.winfo_rooty() + self.root.winfo_height() - toast.winfo_reqheight() - 40
+        toast.geometry(f"+{x}+{y}")
+        
+        toast.after(duration_ms, toast.destroy)
     
     def run(self):
         """Run the main selector."""
         self.root.mainloop()
 
 
-def run_phase1_cli(folder_path: str):
+def run_phase1_cli(folder_path: str, force_reselect: bool = False):
     """Run Phase 1 from command line."""
     print(f"Starting Phase 1: Label extraction from {folder_path}")
     
-    if not os.path.exists(folder_path):
+    # Reject a mistyped path before loading OpenSlide and NumPy
+    if not os.path.isdir(folder_path):
         print(f"Error: Folder does not exist: {folder_path}")
         return False
     
+    import label_extractor
+    
     try:
-        success = label_extractor.run_phase1(folder_path)
+        success = label_extractor.run_phase1(folder_path, force_reselect=force_reselect)
         
         if success:
             print("\\nPhase 1 completed successfully!")
@@ -534,13 +616,14 @@ def run_phase1_cli(folder_path: str):
         return success
     
     except Exception as e:
-        print(f"\\nPhase 1 error: {e}")
-        print(traceback.format_exc())
+        log.exception("Phase 1 error: %s", e)
         return False
 
 
 def run_phase2_cli(folder_path: str = ""):
     """Run Phase 2 from command line."""
+    import renaming_gui
+    
     print("Starting Phase 2: GUI for file renaming")
     
     try:
@@ -548,12 +631,14 @@ def run_phase2_cli(folder_path: str = ""):
         print("\\nPhase 2 completed!")
     
     except Exception as e:
-        print(f"\\nPhase 2 error: {e}")
-        print(traceback.format_exc())
+        log.exception("Phase 2 error: %s", e)
 
 
 def run_setup_guided_workflow():
     """Run the setup-guided workflow."""
+    import label_extractor
+    import setup_screen
+    
     print("Starting setup-guided workflow...")
     
     # Run setup screen
@@ -574,11 +659,13 @@ def run_setup_guided_workflow():
         
         elif required_phase == 'phase1':
             print("\\nRunning Phase 1: Label extraction with configuration...")
+            _preload_phase2()
             success = label_extractor.run_phase1_with_config(folder_path, config_data)
             
             if success:
                 print("\\nPhase 1 completed! Now starting Phase 2...")
                 # Automatically continue to Phase 2 with folder path and config
+                import renaming_gui
                 renaming_gui.run_phase2_with_config(folder_path, config_data)
                 return True
             else:
@@ -587,40 +674,43 @@ def run_setup_guided_workflow():
         
         elif required_phase == 'phase2':
             print("\\nRunning Phase 2: File renaming with configuration...")
+            import renaming_gui
             renaming_gui.run_phase2_with_config(folder_path, config_data)
             return True
         
         return False
     
     except Exception as e:
-        print(f"\\nSetup-guided workflow error: {e}")
-        print(traceback.format_exc())
+        log.exception("Setup-guided workflow error: %s", e)
         return False
 
 
-def run_auto_detect_cli(folder_path: str):
+def run_auto_detect_cli(folder_path: str, force_reselect: bool = False):
     """Run auto-detection from command line."""
     print(f"Auto-detecting required phase for: {folder_path}")
     print("=" * 50)
     
-    if not os.path.exists(folder_path):
-        print(f"Error: Folder does not exist: {folder_path}")
-        return False
-    
     try:
+        # A missing folder also comes back as 'none'; only then is it worth telling the two apart
         required_phase = detect_required_phase(folder_path)
         
         if required_phase == 'none':
-            print("No supported WSI files found.")
+            if not os.path.isdir(folder_path):
+                print(f"Error: Folder does not exist: {folder_path}")
+            else:
+                print("No supported WSI files found.")
             return False
         
         elif required_phase == 'phase1':
+            import label_extractor
             print("\\nRunning Phase 1: Label extraction")
-            success = label_extractor.run_phase1(folder_path)
+            _preload_phase2()
+            success = label_extractor.run_phase1(folder_path, force_reselect=force_reselect)
             
             if success:
                 print("\\nPhase 1 completed! Now starting Phase 2...")
                 # Automatically continue to Phase 2 with folder path
+                import renaming_gui
                 renaming_gui.run_phase2(folder_path)
                 return True
             else:
@@ -629,19 +719,22 @@ def run_auto_detect_cli(folder_path: str):
         
         elif required_phase == 'phase2':
             print("\\nRunning Phase 2: File renaming")
+            import renaming_gui
             renaming_gui.run_phase2(folder_path)
             return True
         
         return False
     
     except Exception as e:
-        print(f"\\nAuto-detect error: {e}")
-        print(traceback.format_exc())
+        log.exception("Auto-detect error: %s", e)
         return False
 
 
 def main():
     """Main application entry point."""
+    # Phase progress goes to the console; per-slide detail is logged at DEBUG
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     parser = argparse.ArgumentParser(
         description="Histology Slide Renaming Tool",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -651,6 +744,7 @@ Examples:
   python main.py /path/to/slides    # Auto-detect for specific folder
   python main.py --gui              # Run GUI selector  
   python main.py --phase1 /path/to/slides  # Extract labels only
+  python main.py --phase1 /path/to/slides --re-crop  # Reselect the saved crop region
   python main.py --phase2           # Run renaming GUI only
         """
     )
@@ -673,6 +767,18 @@ Examples:
         help="Run Phase 2 only: open renaming GUI"
     )
     
+    parser.add_argument(
+        "--re-crop",
+        action="store_true",
+        help="Ignore the crop region saved by a previous Phase 1 run and select it again"
+    )
+    
+    parser.add_argument(
+        "--force-probe",
+        action="store_true",
+        help="Re-run the image display (PhotoImage) check instead of using the cached result"
+    )
+    
     parser.add_argument(
         "--gui", 
         action="store_true",
@@ -684,7 +790,7 @@ Examples:
     try:
         if args.phase1:
             # Run Phase 1 only
-            run_phase1_cli(args.phase1)
+            run_phase1_cli(args.phase1, force_reselect=args.re_crop)
         
         elif args.phase2:
             # Run Phase 2 only
@@ -693,12 +799,12 @@ Examples:
         elif args.gui:
             # Run GUI selector
             print("Starting Histology Slide Renaming Tool...")
-            selector = MainSelector()
+            selector = MainSelector(force_probe=args.force_probe)
             selector.run()
         
         elif args.folder:
             # Auto-detect and run for specified folder
-            run_auto_detect_cli(args.folder)
+            run_auto_detect_cli(args.folder, force_reselect=args.re_crop)
         
         else:
             # Default behavior: run setup-guided workflow
@@ -706,15 +812,14 @@ Examples:
             success = run_setup_guided_workflow()
             if not success:
                 print("Setup cancelled or failed. Starting GUI selector...")
-                selector = MainSelector()
+                selector = MainSelector(force_probe=args.force_probe)
                 selector.run()
     
     except KeyboardInterrupt:
         print("\\n\\nApplication interrupted by user")
     
     except Exception as e:
-        print(f"\\nApplication error: {e}")
-        print(traceback.format_exc())
+        log.exception("Application error: %s", e)
 
 
 if __name__ == "__main__":
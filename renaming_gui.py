@@ -793,7 +793,7 @@ class RenamingGUI:
             return self._slide_path_cache[slide_name]
         
         # Search file system only if not cached
-        for ext in config.SUPPORTED_EXTENSIONS:
+        for ext in sorted(config.SUPPORTED_EXTENSIONS):
             slide_path = os.path.join(self.slide_folder, f"{slide_name}{ext}")
             if os.path.exists(slide_path):
                 self._slide_path_cache[slide_name] = slide_path
@@ -1345,27 +1345,33 @@ class RenamingGUI:
         if not self.naming_sequence or not self.label_files:
             return
         
+        slides_by_base = self._slide_files_by_base()
         for i, label_file in enumerate(self.label_files):
             if i < len(self.naming_sequence):
-                slide_file = self._get_corresponding_slide_file(label_file)
+                slide_file = self._get_corresponding_slide_file(label_file, slides_by_base)
                 if slide_file and slide_file not in self.renaming_data:
                     # Auto-assign the identifier
                     identifier = self.naming_sequence[i]
                     new_name = f"{self.prefix}{identifier}{self.extension}"
                     self.renaming_data[slide_file] = new_name
     
-    def _get_corresponding_slide_file(self, label_file: str) -> Optional[str]:
+    def _slide_files_by_base(self) -> Dict[str, str]:
+        """Map slide base names to slide paths from a single listing of the slide folder."""
+        slides_by_base = {}
+        for slide_file in utils.get_slide_files(self.slide_folder):
+            # setdefault keeps the first slide in sorted order, as the per-label search did
+            slides_by_base.setdefault(os.path.splitext(os.path.basename(slide_file))[0], slide_file)
+        return slides_by_base
+    
+    def _get_corresponding_slide_file(self, label_file: str,
+                                      slides_by_base: Optional[Dict[str, str]] = None) -> Optional[str]:
         """Get the corresponding slide file for a label file."""
         label_base = os.path.splitext(os.path.basename(label_file))[0]
         
-        # Look for slide file with matching base name
-        slide_files = utils.get_slide_files(self.slide_folder)
-        for slide_file in slide_files:
-            slide_base = os.path.splitext(os.path.basename(slide_file))[0]
-            if slide_base == label_base:
-                return slide_file
-        
-        return None
+        # Look for slide file with matching base name; loops pass one listing for all labels
+        if slides_by_base is None:
+            slides_by_base = self._slide_files_by_base()
+        return slides_by_base.get(label_base)
     
     def _smart_adjust_sequence(self, start_index: int, new_identifier: str):
         """Simple sequence adjustment - current file affects next file only."""
@@ -1477,9 +1483,10 @@ class RenamingGUI:
         if not self.naming_sequence or not self.label_files:
             return
         
+        slides_by_base = self._slide_files_by_base()
         for i, label_file in enumerate(self.label_files):
             if i < len(self.naming_sequence):
-                slide_file = self._get_corresponding_slide_file(label_file)
+                slide_file = self._get_corresponding_slide_file(label_file, slides_by_base)
                 if slide_file:
                     # Only update if this was previously auto-assigned
                     # (check if the current naming matches the old sequence)
@@ -1,23 +1,35 @@
 """Utility functions for the histology slide renaming application."""
 
 import os
+import sys
+import json
+import logging
 import shutil
 import csv
-from typing import List, Tuple, Optional
+import importlib.util
+import tempfile
+from typing import Iterator, List, Tuple, Optional
 from pathlib import Path
 import config
 
+log = logging.getLogger(__name__)
+
 def create_directory(path: str) -> None:
     """Create directory if it doesn't exist."""
     os.makedirs(path, exist_ok=True)
 
+def iter_slide_files(folder_path: str) -> Iterator[str]:
+    """Yield supported slide files from the folder in directory order."""
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if os.path.splitext(entry.name)[1].lower() in config.SUPPORTED_EXTENSIONS:
+                yield entry.path
+
 def get_slide_files(folder_path: str) -> List[str]:
     """Get all supported slide files from the folder."""
-    slide_files = []
-    for file in os.listdir(folder_path):
-        if any(file.lower().endswith(ext) for ext in config.SUPPORTED_EXTENSIONS):
-            slide_files.append(os.path.join(folder_path, file))
-    return sorted(slide_files)
+    # Listed fresh on every call: folder mtimes are too coarse on FAT/exFAT and some SMB shares
+    # to tell whether a cached listing is still current
+    return sorted(iter_slide_files(folder_path))
 
 def move_file(src: str, dst_folder: str) -> str:
     """Move file to destination folder, creating folder if needed."""
@@ -87,4 +99,58 @@ def save_renaming_log(renaming_data: List[Tuple[str, str]], log_path: str) -> No
 def should_skip_file(filename: str) -> bool:
     """Check if file should be skipped based on prefix rules."""
     basename = os.path.basename(filename)
-    return any(basename.startswith(prefix) for prefix in config.SKIP_PREFIXES)
\ No newline at end of file
+    return basename.startswith(config.SKIP_PREFIXES)
+
+def simple_crop_available() -> bool:
+    """Check if the optional simple_crop module for coordinate crop entry can be imported."""
+    return importlib.util.find_spec('simple_crop') is not None
+
+def photoimage_works(master=None, force_probe: bool = False) -> bool:
+    """Check if ImageTk.PhotoImage can display images, caching the result per interpreter."""
+    import tkinter as tk
+    import PIL
+    
+    # A Python, Tk or Pillow upgrade can change the answer, so each combination is probed once
+    cache_key = f"{sys.executable}|{tk.TkVersion}|{PIL.__version__}"
+    cache_path = os.path.join(tempfile.gettempdir(), config.PHOTOIMAGE_PROBE_FILENAME)
+    
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached_results = json.load(f)
+    except (OSError, ValueError):
+        cached_results = {}
+    
+    if not force_probe and cache_key in cached_results:
+        return cached_results[cache_key]
+    
+    try:
+        test_root = tk.Toplevel(master) if master is not None else tk.Tk()
+    except Exception as e:
+        # No display yet (no DISPLAY, remote session still starting) - says nothing about PhotoImage
+        log.warning("PhotoImage test skipped, Tk could not start: %s", e)
+        return False
+    
+    # Display a small image in a hidden window; only this outcome is worth caching
+    try:
+        from PIL import Image, ImageTk
+        
+        test_root.withdraw()
+        test_img = Image.new('RGB', (100, 100), color='red')
+        test_photo = ImageTk.PhotoImage(test_img, master=test_root)
+        test_canvas = tk.Canvas(test_root, width=100, height=100)
+        test_canvas.create_image(0, 0, anchor=tk.NW, image=test_photo)
+        works = True
+    except Exception as e:
+        log.warning("PhotoImage test failed: %s", e)
+        works = False
+    finally:
+        test_root.destroy()
+    
+    cached_results[cache_key] = works
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cached_results, f)
+    except OSError:
+        pass  # Without a writable temp dir the probe just runs again next time
+    
+    return works